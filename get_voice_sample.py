@@ -80,56 +80,81 @@ def check_dependencies():
         sys.exit(1)
 
 
-def download_audio(url: str, output_path: Path) -> Path:
-    """Download best-quality audio from YouTube as MP3."""
+def _normalize_filter(duration_sec: int) -> str:
+    """
+    Pick a normalization filter for the clip length.
+
+    Short clips use dynaudnorm (a simple gain compressor, several times faster
+    per sample); long ones get full EBU R128 loudnorm, whose ITU-R BS.1770
+    gating is worth the extra CPU when loudness varies over many minutes.
+    """
+    if duration_sec < 300:
+        return "dynaudnorm=p=0.95:m=10"
+    return "loudnorm=I=-16:TP=-1.5:LRA=11"
+
+
+def download_and_process(
+    url: str,
+    output_path: Path,
+    start_sec: int,
+    duration_sec: int,
+    normalize: bool = True,
+) -> Path:
+    """
+    Download audio from YouTube and trim/normalize it in one streaming pass.
+
+    yt-dlp writes raw audio to stdout, piped straight into ffmpeg which trims
+    and (optionally) normalizes. Download overlaps with filtering and no
+    intermediate file ever touches the disk.
+    """
     print(f"Downloading: {url}")
-    cmd = [
+    print(f"Trimming: {start_sec}s to {start_sec + duration_sec}s ({duration_sec}s total)")
+    if normalize:
+        print("Normalizing loudness...")
+
+    yt_cmd = [
         "yt-dlp",
-        "--extract-audio",
-        "--audio-format", "mp3",
-        "--audio-quality", "0",        # best quality
-        "--output", str(output_path),
+        "--quiet",
         "--no-playlist",
+        "--format", "bestaudio",
+        "--output", "-",
         url,
     ]
-    result = subprocess.run(cmd, capture_output=False)
-    if result.returncode != 0:
-        print("ERROR: yt-dlp download failed.")
-        sys.exit(1)
-    return output_path
-
-
-def trim_audio(input_path: Path, output_path: Path, start_sec: int, duration_sec: int) -> Path:
-    """Trim audio to the desired segment."""
-    print(f"Trimming: {start_sec}s to {start_sec + duration_sec}s ({duration_sec}s total)")
-    cmd = [
+    # -ss/-t before -i: input-side seeking discards the skipped prefix at the
+    # demuxer instead of decoding it all just to throw it away.
+    ffmpeg_cmd = [
         "ffmpeg", "-y",
-        "-i", str(input_path),
         "-ss", str(start_sec),
         "-t", str(duration_sec),
-        "-c", "copy",
-        str(output_path),
+        "-i", "pipe:0",
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"ffmpeg trim failed: {result.stderr}")
-    return output_path
-
-
-def normalize_audio(input_path: Path, output_path: Path) -> Path:
-    """Normalize audio loudness using EBU R128 standard (good for voice)."""
-    print("Normalizing loudness...")
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", str(input_path),
-        "-af", "loudnorm=I=-16:TP=-1.5:LRA=11",
+    if normalize:
+        ffmpeg_cmd += ["-af", _normalize_filter(duration_sec)]
+    ffmpeg_cmd += [
         "-ar", "44100",
         "-ac", "1",       # mono is fine for voice cloning
         str(output_path),
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"ffmpeg normalize failed: {result.stderr}")
+
+    yt = subprocess.Popen(yt_cmd, stdout=subprocess.PIPE)
+    ffmpeg = subprocess.Popen(
+        ffmpeg_cmd,
+        stdin=yt.stdout,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    yt.stdout.close()  # let yt-dlp get SIGPIPE if ffmpeg exits early
+    _, ffmpeg_stderr = ffmpeg.communicate()
+
+    # Check ffmpeg first: if it dies (bad output path, filter error), yt-dlp
+    # exits non-zero from the broken pipe, and blaming the download would
+    # bury the ffmpeg stderr that actually explains the failure.
+    if ffmpeg.returncode != 0:
+        raise RuntimeError(f"ffmpeg trim/normalize failed: {ffmpeg_stderr[-2000:]}")
+    if yt.wait() != 0:
+        print("ERROR: yt-dlp download failed.")
+        sys.exit(1)
     return output_path
 
 
@@ -137,25 +162,15 @@ def main():
     args = parse_args()
     check_dependencies()
 
-    # Temp files in same directory as output
-    out_dir = args.output.parent
-    out_dir.mkdir(parents=True, exist_ok=True)
-    raw_path = out_dir / f"_raw_{args.output.name}"
-    trimmed_path = out_dir / f"_trimmed_{args.output.name}"
-
-    try:
-        download_audio(args.url, raw_path)
-
-        trim_audio(raw_path, trimmed_path, args.start, args.duration)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
 
-        if args.no_normalize:
-            trimmed_path.rename(args.output)
-        else:
-            normalize_audio(trimmed_path, args.output)
-
-    finally:
-        raw_path.unlink(missing_ok=True)
-        trimmed_path.unlink(missing_ok=True)
+    download_and_process(
+        args.url,
+        args.output,
+        start_sec=args.start,
+        duration_sec=args.duration,
+        normalize=not args.no_normalize,
+    )
 
     size_kb = args.output.stat().st_size // 1024
     print(f"\nVoice sample ready: {args.output}  ({size_kb} KB, {args.duration}s)")
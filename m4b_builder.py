@@ -1,8 +1,10 @@
 """m4b_builder.py — Assemble per-chapter MP3s into a final M4B with chapter markers."""
 
-import json
+import io
+import os
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -15,36 +17,60 @@ class ChapterMark:
 
 
 def _run(cmd: list[str], desc: str = "") -> None:
-    """Run a subprocess command, raising on non-zero exit."""
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(
-            f"Command failed ({desc}): {' '.join(cmd)}\n"
-            f"stderr: {result.stderr[-2000:]}"
-        )
+    """Run a subprocess command, raising on non-zero exit.
+
+    stderr is spooled to an unnamed temp file rather than buffered in memory:
+    ffmpeg emits progress lines continuously, and capture_output would grow a
+    Python bytes object for the whole transcode just to show a tail on failure.
+    """
+    with tempfile.TemporaryFile() as stderr_spool:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=stderr_spool)
+        if result.returncode != 0:
+            stderr_spool.seek(0, os.SEEK_END)
+            stderr_spool.seek(max(0, stderr_spool.tell() - 2000))
+            tail = stderr_spool.read().decode("utf-8", errors="replace")
+            raise RuntimeError(
+                f"Command failed ({desc}): {' '.join(cmd)}\n"
+                f"stderr: {tail}"
+            )
 
 
 def get_audio_duration_ms(audio_path: Path) -> int:
     """Return duration of an audio file in milliseconds using ffprobe."""
     cmd = [
         "ffprobe", "-v", "quiet",
-        "-print_format", "json",
-        "-show_streams",
+        "-show_entries", "format=duration",
+        "-of", "default=nw=1:nk=1",
         str(audio_path),
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
     if result.returncode != 0:
         raise RuntimeError(f"ffprobe failed on {audio_path}: {result.stderr}")
-    data = json.loads(result.stdout)
-    for stream in data.get("streams", []):
-        duration = stream.get("duration")
-        if duration:
-            return int(float(duration) * 1000)
-    raise ValueError(f"Could not determine duration of {audio_path}")
+    duration = result.stdout.strip()
+    if not duration:
+        raise ValueError(f"Could not determine duration of {audio_path}")
+    return int(float(duration) * 1000)
+
+
+def _write_concat_list(input_paths: list[Path], dir: Path) -> Path:
+    """Write an ffmpeg concat-demuxer list file, returning its path."""
+    with tempfile.NamedTemporaryFile(
+        mode="w", suffix=".txt", delete=False, dir=dir
+    ) as tmp:
+        for p in input_paths:
+            # ffmpeg concat list uses single-quoted paths
+            tmp.write(f"file '{p.resolve()}'\n")
+        return Path(tmp.name)
 
 
 def concatenate_audio_files(input_paths: list[Path], output_path: Path) -> Path:
-    """Concatenate multiple MP3 files into one using ffmpeg concat demuxer."""
+    """Concatenate multiple MP3 files into one using ffmpeg concat demuxer.
+
+    Uses stream copy (-c copy), so no decode/re-encode happens and no
+    generational quality loss occurs. This relies on every input sharing the
+    same sample rate and bitrate — guaranteed here because all chunks come
+    from ElevenLabs with one output_format setting.
+    """
     if len(input_paths) == 1:
         # Single file: just copy it
         _run(
@@ -53,14 +79,7 @@ def concatenate_audio_files(input_paths: list[Path], output_path: Path) -> Path:
         )
         return output_path
 
-    # Write concat list to a temp file
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".txt", delete=False, dir=output_path.parent
-    ) as tmp:
-        for p in input_paths:
-            # ffmpeg concat list uses single-quoted paths
-            tmp.write(f"file '{p.resolve()}'\n")
-        concat_list = Path(tmp.name)
+    concat_list = _write_concat_list(input_paths, output_path.parent)
 
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -81,15 +100,61 @@ def concatenate_audio_files(input_paths: list[Path], output_path: Path) -> Path:
     return output_path
 
 
+def mp3_concat_native(input_paths: list[Path], output_path: Path) -> Path:
+    """Concatenate CBR MP3 files by appending bytes — no ffmpeg involved.
+
+    MP3 frames are self-delimiting, so appending streams is valid as long as
+    every input shares one encoder configuration — guaranteed here because
+    all chunks come from ElevenLabs with one output_format. ID3v2 tags on
+    files after the first are stripped so no tag bytes land mid-stream.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("wb") as out:
+        for i, path in enumerate(input_paths):
+            data = path.read_bytes()
+            if i > 0 and data.startswith(b"ID3") and len(data) > 10:
+                # ID3v2 payload size is a 4-byte syncsafe int after the 6-byte header
+                tag_size = 10 + (
+                    (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+                )
+                data = data[tag_size:]
+            out.write(data)
+    return output_path
+
+
+def _durations_via_mutagen(paths: list[Path]) -> list[int] | None:
+    """Read MP3 durations in-process via mutagen (no subprocess at all).
+
+    Returns None if mutagen is not installed, so callers can fall back to ffprobe.
+    """
+    try:
+        from mutagen.mp3 import MP3
+    except ImportError:
+        return None
+    return [int(MP3(str(p)).info.length * 1000) for p in paths]
+
+
+def _durations_ms(paths: list[Path]) -> list[int]:
+    """Return durations for all files, preferring mutagen over N ffprobe forks."""
+    durations = _durations_via_mutagen(paths)
+    if durations is not None:
+        return durations
+    # ffprobe calls are subprocess waits (I/O-bound), so probe all files
+    # concurrently; executor.map preserves input order.
+    with ThreadPoolExecutor(max_workers=min(16, len(paths) or 1)) as executor:
+        return list(executor.map(get_audio_duration_ms, paths))
+
+
 def build_chapter_marks(chapter_audio_pairs: list[tuple[str, Path]]) -> list[ChapterMark]:
     """
     Given list of (title, mp3_path), compute cumulative chapter start/end times.
     Returns list of ChapterMark objects.
     """
+    durations = _durations_ms([path for _, path in chapter_audio_pairs])
+
     marks = []
     cursor_ms = 0
-    for title, path in chapter_audio_pairs:
-        duration_ms = get_audio_duration_ms(path)
+    for (title, _), duration_ms in zip(chapter_audio_pairs, durations):
         marks.append(ChapterMark(
             title=title,
             start_ms=cursor_ms,
@@ -107,43 +172,57 @@ def write_ffmetadata(
     comment: str = "Narrated by AI voice",
 ) -> Path:
     """Write an ffmetadata file encoding chapter markers for M4B creation."""
-    lines = [
-        ";FFMETADATA1",
-        f"title={book_title}",
-        f"artist={author}",
-        f"album={book_title}",
-        "genre=Audiobook",
-        f"comment={comment}",
-        "",
-    ]
+    buf = io.StringIO()
+    buf.write(
+        f";FFMETADATA1\n"
+        f"title={book_title}\n"
+        f"artist={author}\n"
+        f"album={book_title}\n"
+        f"genre=Audiobook\n"
+        f"comment={comment}\n\n"
+    )
     for mark in chapter_marks:
-        lines += [
-            "[CHAPTER]",
-            "TIMEBASE=1/1000",
-            f"START={mark.start_ms}",
-            f"END={mark.end_ms}",
-            f"title={mark.title}",
-            "",
-        ]
-    metadata_path.write_text("\n".join(lines), encoding="utf-8")
+        buf.write(
+            f"[CHAPTER]\n"
+            f"TIMEBASE=1/1000\n"
+            f"START={mark.start_ms}\n"
+            f"END={mark.end_ms}\n"
+            f"title={mark.title}\n\n"
+        )
+    metadata_path.write_text(buf.getvalue(), encoding="utf-8")
     return metadata_path
 
 
 def build_m4b(
-    full_audio_path: Path,
+    audio_input: Path | list[Path],
     metadata_path: Path,
     cover_image_path: Path | None,
     output_m4b_path: Path,
+    audio_bitrate: str = "64k",
+    sample_rate: int | None = None,
 ) -> Path:
     """
-    Convert concatenated MP3 + ffmetadata into final M4B with chapters and cover art.
-    Encodes audio as AAC 64kbps (standard audiobook quality).
+    Convert MP3 audio + ffmetadata into final M4B with chapters and cover art.
+    Encodes audio as AAC at audio_bitrate (64kbps is standard audiobook
+    quality); sample_rate resamples when the source is below 44.1kHz.
+
+    audio_input may be a single MP3 path, or a list of chapter MP3s which are
+    joined by the concat demuxer during the AAC encode itself — no intermediate
+    concatenated file is written or re-read.
     """
     output_m4b_path.parent.mkdir(parents=True, exist_ok=True)
 
+    concat_list = None
+    if isinstance(audio_input, list):
+        concat_list = _write_concat_list(audio_input, output_m4b_path.parent)
+        audio_args = ["-f", "concat", "-safe", "0", "-i", str(concat_list)]
+    else:
+        audio_args = ["-i", str(audio_input)]
+
     cmd = [
         "ffmpeg", "-y",
-        "-i", str(full_audio_path),
+        "-fflags", "+bitexact",
+        *audio_args,
         "-i", str(metadata_path),
     ]
 
@@ -159,14 +238,23 @@ def build_m4b(
 
     cmd += [
         "-map_metadata", "1",
+        "-map_metadata:s", "-1",   # drop per-stream ID3 leftovers from the MP3 input
         "-c:a", "aac",
-        "-b:a", "64k",
+        "-b:a", audio_bitrate,
+    ]
+    if sample_rate is not None:
+        cmd += ["-ar", str(sample_rate)]
+    cmd += [
         "-c:v", "copy",       # keep cover JPEG as-is (don't transcode to h264)
         "-movflags", "+faststart",
         str(output_m4b_path),
     ]
 
-    _run(cmd, desc="build M4B")
+    try:
+        _run(cmd, desc="build M4B")
+    finally:
+        if concat_list is not None:
+            concat_list.unlink(missing_ok=True)
     return output_m4b_path
 
 
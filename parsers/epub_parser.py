@@ -1,12 +1,12 @@
 """parsers/epub_parser.py — Parse EPUB (packed or directory) into chapters."""
 
+import functools
 import re
-import xml.etree.ElementTree as ET
+import tempfile
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from bs4 import BeautifulSoup
-
 from models import BookMetadata, Chapter
 from parsers.base import ParseResult, clean_text
 
@@ -23,23 +23,32 @@ ROMAN_MAP = {
 }
 
 
-def _find_oebps(epub_path: Path) -> tuple[Path, bool]:
-    """Return (oebps_dir, is_zip)."""
+def _find_oebps(epub_path: Path) -> tuple[Path | zipfile.Path, bool]:
+    """Return (oebps_dir, is_zip).
+
+    For packed EPUBs the returned handle is a zipfile.Path, which supports
+    the same `/`, exists() and read_bytes() operations used downstream, so
+    the archive is read in place without unpacking to disk.
+    """
     if epub_path.is_dir():
         oebps = epub_path / "OEBPS"
         if not oebps.exists():
             raise FileNotFoundError(f"No OEBPS directory found in {epub_path}")
         return oebps, False
     elif epub_path.suffix.lower() == ".epub" and zipfile.is_zipfile(epub_path):
-        return epub_path, True
+        oebps = zipfile.Path(zipfile.ZipFile(epub_path)) / "OEBPS"
+        if not oebps.exists():
+            raise FileNotFoundError(f"No OEBPS directory found in {epub_path}")
+        return oebps, True
     else:
         raise ValueError(f"Cannot determine EPUB format for {epub_path}")
 
 
-def _parse_toc_ncx(ncx_path: Path) -> list[dict]:
+def _parse_toc_ncx(ncx_path: Path | zipfile.Path) -> list[dict]:
     """Parse toc.ncx, skipping first 2 and last 1 nav points (Gutenberg boilerplate)."""
-    tree = ET.parse(ncx_path)
-    root = tree.getroot()
+    from lxml import etree
+
+    root = etree.fromstring(ncx_path.read_bytes())
     nav_map = root.find(f"{{{NCX_NS}}}navMap")
     if nav_map is None:
         raise ValueError("No navMap found in toc.ncx")
@@ -59,9 +68,13 @@ def _parse_toc_ncx(ncx_path: Path) -> list[dict]:
     return chapters
 
 
+_CH_RE = re.compile(r"^CHAPTER\s+([IVXLCDM]+)\s+(.+)$", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=128)
 def _clean_title(raw: str) -> tuple[str, str]:
     """Convert 'CHAPTER I TITLE' → ('Chapter I: Title', 'Chapter One')."""
-    m = re.match(r"^CHAPTER\s+([IVXLCDM]+)\s+(.+)$", raw, re.IGNORECASE)
+    m = _CH_RE.match(raw)
     if m:
         roman = m.group(1).upper()
         subtitle = _title_case(m.group(2).strip())
@@ -70,47 +83,76 @@ def _clean_title(raw: str) -> tuple[str, str]:
     return _title_case(raw), _title_case(raw)
 
 
+_TITLE_FIX_RE = re.compile(r"(?<=\w)(['’])(\w)|(?<=\d)([A-Za-z])")
+
+
 def _title_case(text: str) -> str:
-    """Title-case that handles apostrophes correctly."""
-    return " ".join(
-        word[0].upper() + word[1:].lower() if word else ""
-        for word in text.split()
+    """Title-case that handles apostrophes and digits correctly."""
+    # str.title() runs in C but treats apostrophes and digits as word breaks,
+    # capitalizing what follows ("Don'T", "3Rd"); lower-case the letter after
+    # any in-word apostrophe or digit to fix that.
+    return _TITLE_FIX_RE.sub(
+        lambda m: m.group(3).lower() if m.group(3) else m.group(1) + m.group(2).lower(),
+        text.title(),
     )
 
 
-def _extract_chapter_text(xhtml_path: Path) -> str:
+@functools.lru_cache(maxsize=1)
+def _xhtml_parser():
+    """One shared XML parser per process (lxml parsers are reusable).
+
+    recover=True tolerates undeclared HTML entities (&nbsp; and friends) in
+    otherwise well-formed XHTML without loading the DTD.
+    """
+    from lxml import etree
+
+    return etree.XMLParser(recover=True)
+
+
+def _extract_chapter_text(xhtml_path: Path | zipfile.Path) -> str:
     """Parse a single chapter XHTML file, return cleaned text."""
-    content = xhtml_path.read_bytes()
-    soup = BeautifulSoup(content, features="lxml-xml")
+    from lxml import etree
+
+    # XHTML must go through the XML parser: HTML parsing rules forbid <p>
+    # inside <h2> and hoist such paragraphs out of the heading, which would
+    # turn the ancestor::h2 exclusion below into dead code. local-name()
+    # keeps the XPaths working with or without the XHTML default namespace.
+    tree = etree.fromstring(xhtml_path.read_bytes(), _xhtml_parser())
 
+    chapter_divs = tree.xpath(
+        '//*[local-name()="div"]'
+        '[contains(concat(" ", normalize-space(@class), " "), " chapter ")]'
+    )
     chapter_div = None
-    for div in soup.find_all("div", class_="chapter"):
-        if div.get("id") and div["id"].startswith("pgepubid"):
+    for div in chapter_divs:
+        if (div.get("id") or "").startswith("pgepubid"):
             chapter_div = div
             break
     if chapter_div is None:
-        divs = soup.find_all("div", class_="chapter")
-        chapter_div = divs[-1] if divs else soup.body
+        if chapter_divs:
+            chapter_div = chapter_divs[-1]
+        else:
+            bodies = tree.xpath('//*[local-name()="body"]')
+            chapter_div = bodies[0] if bodies else tree
 
     paragraphs = []
-    for tag in chapter_div.find_all(["p"]):
-        if tag.find_parent("h2"):
-            continue
-        text = tag.get_text(separator=" ", strip=True)
+    for p in chapter_div.xpath('.//*[local-name()="p"][not(ancestor::*[local-name()="h2"])]'):
+        text = " ".join("".join(p.itertext()).split())
         if text:
             paragraphs.append(text)
 
     return clean_text("\n\n".join(paragraphs))
 
 
-def _extract_metadata(oebps: Path) -> BookMetadata:
+def _extract_metadata(oebps: Path | zipfile.Path) -> BookMetadata:
     """Read title, author, cover from content.opf."""
+    from lxml import etree
+
     opf = oebps / "content.opf"
     title, author, cover_path = "Untitled", "Unknown", None
 
     if opf.exists():
-        tree = ET.parse(opf)
-        root = tree.getroot()
+        root = etree.fromstring(opf.read_bytes())
         t = root.find(f".//{{{DC_NS}}}title")
         if t is not None and t.text:
             title = t.text.strip()
@@ -122,7 +164,15 @@ def _extract_metadata(oebps: Path) -> BookMetadata:
                 href = item.get("href", "")
                 candidate = oebps / href
                 if candidate.exists():
-                    cover_path = candidate
+                    if isinstance(candidate, zipfile.Path):
+                        # ffmpeg needs a real file; extract the cover once
+                        with tempfile.NamedTemporaryFile(
+                            delete=False, prefix="speakbook_cover_", suffix=Path(href).suffix
+                        ) as tmp:
+                            tmp.write(candidate.read_bytes())
+                        cover_path = Path(tmp.name)
+                    else:
+                        cover_path = candidate
                     break
 
     return BookMetadata(title=title, author=author, cover_path=cover_path, source_format="epub")
@@ -133,22 +183,29 @@ def parse_epub(epub_path: Path) -> ParseResult:
     epub_path = Path(epub_path)
     oebps, is_zip = _find_oebps(epub_path)
 
-    if is_zip:
-        raise NotImplementedError(
-            "Packed EPUB not yet supported. "
-            "Please unzip first: unzip book.epub -d book.epub.dir"
-        )
-
     toc_entries = _parse_toc_ncx(oebps / "toc.ncx")
     metadata = _extract_metadata(oebps)
 
-    chapters = []
-    for i, entry in enumerate(toc_entries, start=1):
+    xhtml_paths = []
+    for entry in toc_entries:
         xhtml_path = oebps / entry["src_file"]
         if not xhtml_path.exists():
             raise FileNotFoundError(f"Chapter file not found: {xhtml_path}")
+        xhtml_paths.append(xhtml_path)
+
+    # Each chapter is an independent parse + clean (CPU-bound), so fan out
+    # across cores; executor.map preserves TOC order. zipfile.Path handles
+    # share one archive file object and don't pickle, so packed EPUBs are
+    # extracted serially (zip reads serialize on the handle anyway).
+    if len(xhtml_paths) > 1 and not is_zip:
+        with ProcessPoolExecutor() as executor:
+            texts = list(executor.map(_extract_chapter_text, xhtml_paths, chunksize=2))
+    else:
+        texts = [_extract_chapter_text(p) for p in xhtml_paths]
+
+    chapters = []
+    for i, (entry, text) in enumerate(zip(toc_entries, texts), start=1):
         display_title, tts_title = _clean_title(entry["title_raw"])
-        text = _extract_chapter_text(xhtml_path)
         chapters.append(Chapter(index=i, title=display_title, tts_title=tts_title, text=text))
 
     return ParseResult(chapters=chapters, metadata=metadata)
@@ -36,14 +36,18 @@ def _split_by_headings(content: str) -> list[tuple[str, str]]:
     # Use the shallowest heading level present
     levels = [len(m.group(1)) for m in matches]
     split_level = min(levels)
-    filtered = [(m.start(), m.group(2).strip()) for m in matches if len(m.group(1)) == split_level]
+    # (start, end, title) — m.end() is the end of the heading line, so the
+    # body slice needs no rescan of content for the newline
+    filtered = [
+        (m.start(), m.end(), m.group(2).strip())
+        for m in matches
+        if len(m.group(1)) == split_level
+    ]
 
     result = []
-    for i, (pos, title) in enumerate(filtered):
-        # Body starts after the heading line
-        heading_line_end = content.index("\n", pos) + 1 if "\n" in content[pos:] else len(content)
+    for i, (_, heading_end, title) in enumerate(filtered):
         end = filtered[i + 1][0] if i + 1 < len(filtered) else len(content)
-        body = content[heading_line_end:end].strip()
+        body = content[heading_end:end].strip()
         result.append((title, body))
 
     return result
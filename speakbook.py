@@ -19,12 +19,31 @@ Voice cloning:
 import argparse
 import json
 import os
+import re
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+# orjson parses/serializes several times faster than stdlib json and is
+# byte-oriented end to end; fall back silently when it isn't installed.
+try:
+    import orjson
+
+    def _loads(data: bytes):
+        return orjson.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _loads(data: bytes):
+        return json.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
 
 def check_ffmpeg():
     if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
@@ -70,6 +89,10 @@ Examples:
         "--no-library-search", action="store_true", default=False,
         help="Skip searching ElevenLabs Voice Library",
     )
+    parser.add_argument(
+        "--refresh-voice", action="store_true", default=False,
+        help="Bypass the cached Voice Library search result and query again",
+    )
     parser.add_argument(
         "--model",
         choices=["eleven_multilingual_v2", "eleven_turbo_v2_5", "eleven_monolingual_v1"],
@@ -88,6 +111,20 @@ Examples:
         "--output-dir", type=Path, default=Path("output"), metavar="DIR",
         help="Working directory for intermediate files (default: ./output)",
     )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, metavar="N",
+        help="Number of TTS requests in flight at once (default: 4)",
+    )
+    parser.add_argument(
+        "--optimize-latency", type=int, choices=[0, 1, 2, 3, 4], default=3,
+        help="ElevenLabs streaming-latency optimization level (default: 3)",
+    )
+    parser.add_argument(
+        "--audio-quality",
+        choices=["mp3_22050_32", "mp3_44100_64", "mp3_44100_96", "mp3_44100_128"],
+        default="mp3_22050_32",
+        help="TTS output encoding; spoken word needs far less than music bitrate (default: mp3_22050_32)",
+    )
     parser.add_argument(
         "--chapters", type=str, default=None, metavar="RANGE",
         help="Process only these chapters, e.g. '1-3' or '5'",
@@ -138,14 +175,58 @@ def parse_chapter_range(range_str: str) -> range:
 
 
 def load_progress(path: Path) -> dict:
+    """Load progress: the JSON snapshot plus a replay of the chunk WAL.
+
+    progress.json is a snapshot written at chapter boundaries; the .log file
+    next to it is an append-only list of chunk keys finished since the last
+    snapshot, so a crash mid-chapter loses no completed chunks.
+
+    Both completed_* collections are sets in memory — membership tests on
+    the resume path are O(1) instead of scanning a growing list.
+    """
+    progress = {"completed_chapters": [], "completed_chunks": []}
     if path.exists():
-        return json.loads(path.read_text())
-    return {"completed_chapters": [], "completed_chunks": []}
+        # read_bytes + a bytes-native parser skips a separate UTF-8 decode pass
+        progress.update(_loads(path.read_bytes()))
+    progress["completed_chapters"] = set(progress["completed_chapters"])
+    progress["completed_chunks"] = set(progress["completed_chunks"])
+    wal = path.with_suffix(".log")
+    if wal.exists():
+        progress["completed_chunks"].update(
+            line for line in wal.read_text().splitlines() if line
+        )
+    return progress
+
+
+def append_progress(chunk_key: str, wal_path: Path) -> None:
+    """Record one completed chunk in the WAL — O(1) per chunk, instead of
+    rewriting the whole (growing) progress JSON after every API call."""
+    with wal_path.open("a") as f:
+        f.write(chunk_key + "\n")
 
 
 def save_progress(progress: dict, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(progress, indent=2))
+    # Compact separators skip the pretty-printer and roughly halve the file;
+    # write-then-rename keeps the snapshot atomic if we crash mid-write.
+    # Sets serialize as sorted lists so snapshots stay valid JSON and diffable
+    snapshot = {
+        k: sorted(v) if isinstance(v, set) else v for k, v in progress.items()
+    }
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_bytes(_dumps(snapshot))
+    os.replace(tmp, path)
+    # The snapshot now covers everything the WAL recorded
+    path.with_suffix(".log").unlink(missing_ok=True)
+
+
+_WORD_RE = re.compile(r"\S+")
+
+# One-pass filename sanitization; also covers Windows-forbidden characters
+_FN_TRANS = str.maketrans({
+    " ": "_", "/": "_", "\\": "_",
+    ":": "", "?": "", "*": "", '"': "", "<": "", ">": "", "|": "",
+})
 
 
 def print_chapter_list(chapters, metadata=None, show_chars: bool = True):
@@ -157,7 +238,9 @@ def print_chapter_list(chapters, metadata=None, show_chars: bool = True):
     print("-" * 70)
     total_chars = 0
     for ch in chapters:
-        word_count = len(ch.text.split())
+        # Count matches instead of .split(): no throwaway word list for
+        # multi-hundred-KB chapters on every dry run
+        word_count = sum(1 for _ in _WORD_RE.finditer(ch.text))
         char_count = len(ch.text)
         total_chars += char_count
         if show_chars:
@@ -178,7 +261,8 @@ def main():
     args = parse_args()
     load_dotenv()
 
-    if not args.dry_run:
+    # The MP3 path concatenates natively in Python; only M4B needs ffmpeg/ffprobe
+    if not args.dry_run and args.output_format == "m4b":
         check_ffmpeg()
 
     # Import parsers and tools (lazy to keep --help fast)
@@ -188,9 +272,10 @@ def main():
         build_m4b,
         concatenate_audio_files,
         format_duration,
+        mp3_concat_native,
         write_ffmetadata,
     )
-    from tts_engine import synthesize_chapter, VoicePlanError
+    from tts_engine import synthesize_book, VoicePlanError
     from voice_setup import setup_voice, DEFAULT_VOICE_ID
 
     # Parse input file
@@ -227,66 +312,106 @@ def main():
         print("Add it to .env:  ELEVENLABS_API_KEY=your_key_here")
         sys.exit(1)
 
+    import httpx
     from elevenlabs import ElevenLabs
-    client = ElevenLabs(api_key=api_key)
-
-    # Resolve voice
-    if args.voice_id:
-        voice_id = args.voice_id
-        print(f"Using voice ID from CLI: {voice_id}")
-    else:
-        voice_id = setup_voice(
-            client,
-            sample_path=args.voice_sample,
-            use_library=not args.no_library_search,
-        )
-
-    print(f"Voice ID: {voice_id}")
-    print(f"Model: {args.model}")
-    print(f"Output format: {args.output_format}")
-    print()
-
-    # Set up output directories
-    output_dir = args.output_dir
-    chunks_dir = output_dir / "audio_chunks"
-    chapters_dir = output_dir / "chapters"
-    chunks_dir.mkdir(parents=True, exist_ok=True)
-    chapters_dir.mkdir(parents=True, exist_ok=True)
-
-    progress_file = output_dir / "progress.json"
-    progress = {} if args.no_resume else load_progress(progress_file)
-    progress.setdefault("completed_chapters", [])
-    progress.setdefault("completed_chunks", [])
 
-    def _save(p):
-        save_progress(p, progress_file)
+    # One HTTP/2 client shared by every chunk request so the parallel pool
+    # reuses pooled connections and TLS sessions instead of renegotiating
+    # the handshake per request.
+    http_client = httpx.Client(
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=16, keepalive_expiry=300),
+    )
+    client = ElevenLabs(api_key=api_key, httpx_client=http_client)
 
-    # Phase 1: TTS synthesis
-    print("=== Phase 1: Synthesizing audio ===\n")
-    chapter_audio_pairs = []
+    try:
+        # Resolve voice
+        if args.voice_id:
+            voice_id = args.voice_id
+            print(f"Using voice ID from CLI: {voice_id}")
+        else:
+            voice_id = setup_voice(
+                client,
+                sample_path=args.voice_sample,
+                use_library=not args.no_library_search,
+                refresh_library=args.refresh_voice,
+            )
 
-    for chapter in chapters:
-        safe_title = chapter.title[:40].replace(" ", "_").replace(":", "").replace("/", "_")
-        chapter_mp3 = chapters_dir / f"ch{chapter.index:02d}_{safe_title}.mp3"
+        print(f"Voice ID: {voice_id}")
+        print(f"Model: {args.model}")
+        print(f"Output format: {args.output_format}")
+        print()
 
-        if chapter.index in progress["completed_chapters"] and chapter_mp3.exists():
-            print(f"  Skipping Chapter {chapter.index} (already complete)")
-            chapter_audio_pairs.append((chapter.title, chapter_mp3))
-            continue
+        # Set up output directories
+        output_dir = args.output_dir
+        chunks_dir = output_dir / "audio_chunks"
+        chapters_dir = output_dir / "chapters"
+        chunks_dir.mkdir(parents=True, exist_ok=True)
+        chapters_dir.mkdir(parents=True, exist_ok=True)
+
+        progress_file = output_dir / "progress.json"
+        progress_wal = progress_file.with_suffix(".log")
+        if args.no_resume:
+            progress_wal.unlink(missing_ok=True)
+        progress = {} if args.no_resume else load_progress(progress_file)
+        progress.setdefault("completed_chapters", set())
+        progress.setdefault("completed_chunks", set())
+
+        def _save(p):
+            save_progress(p, progress_file)
+
+        def _record_chunk(chunk_key):
+            append_progress(chunk_key, progress_wal)
+
+        # Phase 1: TTS synthesis
+        print("=== Phase 1: Synthesizing audio ===\n")
+
+        chapter_mp3s = {}
+        for chapter in chapters:
+            safe_title = chapter.title[:40].translate(_FN_TRANS)
+            chapter_mp3s[chapter.index] = chapters_dir / f"ch{chapter.index:02d}_{safe_title}.mp3"
+
+        # Chapters already assembled in a previous run need no re-planning.
+        # One listdir replaces a stat syscall per chapter.
+        existing_mp3s = set(os.listdir(chapters_dir))
+        todo_chapters = []
+        for chapter in chapters:
+            if chapter.index in progress["completed_chapters"] and chapter_mp3s[chapter.index].name in existing_mp3s:
+                print(f"  Skipping Chapter {chapter.index} (already complete)")
+            else:
+                todo_chapters.append(chapter)
+
+        # M4B needs ffmpeg anyway; the MP3 path stays ffmpeg-free end to end
+        concat_fn = concatenate_audio_files if args.output_format == "m4b" else mp3_concat_native
+
+        # Concat is local disk I/O while synthesis is network-bound: one
+        # background worker pipelines the two stages so assembling a chapter
+        # never stalls the synthesis drain.
+        concat_pool = ThreadPoolExecutor(max_workers=1)
+        concat_futures = []
+
+        def _on_chapter_complete(chapter_index, chunk_paths):
+            # Fires from the synthesis loop as soon as a chapter's last chunk
+            # lands; the concat itself runs on the background worker
+            concat_futures.append((
+                chapter_index,
+                concat_pool.submit(concat_fn, chunk_paths, chapter_mp3s[chapter_index]),
+            ))
 
-        print(f"Chapter {chapter.index}: {chapter.title}")
         try:
-            chunk_paths = synthesize_chapter(
+            synthesize_book(
                 client=client,
-                chapter_index=chapter.index,
-                chapter_title=chapter.title,
-                tts_title=chapter.tts_title,
-                chapter_text=chapter.text,
+                chapters=todo_chapters,
                 voice_id=voice_id,
                 model_id=args.model,
                 chunks_dir=chunks_dir,
                 progress=progress,
-                save_progress_fn=_save,
+                record_chunk_fn=_record_chunk,
+                max_workers=args.concurrency,
+                optimize_streaming_latency=args.optimize_latency,
+                output_format=args.audio_quality,
+                on_chapter_complete=_on_chapter_complete,
             )
         except VoicePlanError:
             if voice_id == DEFAULT_VOICE_ID:
@@ -294,76 +419,89 @@ def main():
             print(f"\n  WARNING: Voice '{voice_id}' requires a paid plan.")
             print(f"  Falling back to default voice (Aria, {DEFAULT_VOICE_ID}).\n")
             voice_id = DEFAULT_VOICE_ID
-            chunk_paths = synthesize_chapter(
+            synthesize_book(
                 client=client,
-                chapter_index=chapter.index,
-                chapter_title=chapter.title,
-                tts_title=chapter.tts_title,
-                chapter_text=chapter.text,
+                chapters=todo_chapters,
                 voice_id=voice_id,
                 model_id=args.model,
                 chunks_dir=chunks_dir,
                 progress=progress,
-                save_progress_fn=_save,
+                record_chunk_fn=_record_chunk,
+                max_workers=args.concurrency,
+                optimize_streaming_latency=args.optimize_latency,
+                output_format=args.audio_quality,
+                on_chapter_complete=_on_chapter_complete,
             )
 
-        print(f"  Concatenating {len(chunk_paths)} chunks...")
-        concatenate_audio_files(chunk_paths, chapter_mp3)
-
-        progress["completed_chapters"].append(chapter.index)
-        _save(progress)
-
-        chapter_audio_pairs.append((chapter.title, chapter_mp3))
+        # Drain the concat pipeline before Phase 2 touches the chapter MP3s.
+        # A chapter isn't marked complete until its concat has finished, and
+        # progress mutation stays on the main thread; an interrupted run just
+        # redoes cheap local concats, the chunk WAL preserves all API work.
+        for chapter_index, fut in concat_futures:
+            fut.result()
+            progress["completed_chapters"].add(chapter_index)
+        concat_pool.shutdown()
+        if concat_futures:
+            _save(progress)
+
+        chapter_audio_pairs = [(ch.title, chapter_mp3s[ch.index]) for ch in chapters]
         print()
 
-    # Phase 2: Assemble output
-    safe_book_title = metadata.title.replace(" ", "_").replace("/", "_")
+        # Phase 2: Assemble output
+        safe_book_title = metadata.title.translate(_FN_TRANS)
 
-    if args.output_format == "mp3":
-        # MP3: just concatenate all chapter MP3s
-        print("=== Phase 2: Building MP3 ===\n")
-        default_output = output_dir / f"{safe_book_title}.mp3"
-        output_file = args.output or default_output
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        if args.output_format == "mp3":
+            # MP3: just concatenate all chapter MP3s
+            print("=== Phase 2: Building MP3 ===\n")
+            default_output = output_dir / f"{safe_book_title}.mp3"
+            output_file = args.output or default_output
+            output_file.parent.mkdir(parents=True, exist_ok=True)
 
-        print("  Concatenating all chapters...")
-        concatenate_audio_files([p for _, p in chapter_audio_pairs], output_file)
+            print("  Concatenating all chapters...")
+            mp3_concat_native([p for _, p in chapter_audio_pairs], output_file)
 
-    else:
-        # M4B: full chapter-marked audiobook
-        print("=== Phase 2: Building M4B ===\n")
-
-        print("  Measuring chapter durations...")
-        chapter_marks = build_chapter_marks(chapter_audio_pairs)
-
-        metadata_path = output_dir / "ffmetadata.txt"
-        write_ffmetadata(chapter_marks, metadata_path, metadata.title, metadata.author)
-        print(f"  Chapter metadata written: {len(chapter_marks)} chapters")
-
-        full_audio = output_dir / "full_audio.mp3"
-        print("  Concatenating all chapters...")
-        concatenate_audio_files([p for _, p in chapter_audio_pairs], full_audio)
-
-        cover_path = metadata.cover_path
-        if cover_path:
-            print(f"  Cover image: {cover_path.name}")
-
-        default_output = output_dir / f"{safe_book_title}.m4b"
-        output_file = args.output or default_output
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-
-        print(f"  Encoding M4B: {output_file}")
-        build_m4b(full_audio, metadata_path, cover_path, output_file)
-
-    # Summary
-    print(f"\nDone! Audiobook saved to: {output_file}")
-    if args.output_format == "m4b":
-        total_ms = chapter_marks[-1].end_ms if chapter_marks else 0
-        print(f"Total duration: {format_duration(total_ms)}")
-        print("Chapters:")
-        for mark in chapter_marks:
-            start = format_duration(mark.start_ms)
-            print(f"  [{start}] {mark.title}")
+        else:
+            # M4B: full chapter-marked audiobook
+            print("=== Phase 2: Building M4B ===\n")
+
+            print("  Measuring chapter durations...")
+            chapter_marks = build_chapter_marks(chapter_audio_pairs)
+
+            metadata_path = output_dir / "ffmetadata.txt"
+            write_ffmetadata(chapter_marks, metadata_path, metadata.title, metadata.author)
+            print(f"  Chapter metadata written: {len(chapter_marks)} chapters")
+
+            cover_path = metadata.cover_path
+            if cover_path:
+                print(f"  Cover image: {cover_path.name}")
+
+            default_output = output_dir / f"{safe_book_title}.m4b"
+            output_file = args.output or default_output
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+
+            print(f"  Encoding M4B: {output_file}")
+            # 22.05kHz source carries nothing above 11kHz — match the AAC
+            # encode to it rather than upsampling into empty spectrum
+            aac_kwargs = (
+                {"audio_bitrate": "48k", "sample_rate": 22050}
+                if args.audio_quality == "mp3_22050_32" else {}
+            )
+            build_m4b(
+                [p for _, p in chapter_audio_pairs], metadata_path, cover_path,
+                output_file, **aac_kwargs,
+            )
+
+        # Summary
+        print(f"\nDone! Audiobook saved to: {output_file}")
+        if args.output_format == "m4b":
+            total_ms = chapter_marks[-1].end_ms if chapter_marks else 0
+            print(f"Total duration: {format_duration(total_ms)}")
+            print("Chapters:")
+            for mark in chapter_marks:
+                start = format_duration(mark.start_ms)
+                print(f"  [{start}] {mark.title}")
+    finally:
+        http_client.close()
 
 
 if __name__ == "__main__":
@@ -1,13 +1,36 @@
 """tts_engine.py — ElevenLabs TTS synthesis with chunking and resumability."""
 
+import os
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import chain
 from pathlib import Path
 
+import httpx
+from elevenlabs import VoiceSettings
 from tqdm import tqdm
 
 CHUNK_SIZE_CHARS = 4800
 MAX_RETRIES = 3
+DEFAULT_CONCURRENCY = 4
+
+# One settings object shared across every chunk request — the SDK only
+# serializes it, so there is no point rebuilding it per call.
+_DEFAULT_VOICE_SETTINGS = VoiceSettings(
+    stability=0.5,
+    similarity_boost=0.75,
+    style=0.0,
+    use_speaker_boost=True,
+)
+
+# Split after .!? + whitespace + capital/quote, but not after common honorifics:
+# fewer spurious splits means fewer, fuller API chunks.
+_SENTENCE_SPLIT_RE = re.compile(
+    r'(?<!\bDr\.)(?<!\bMr\.)(?<!\bSt\.)(?<!\bMrs\.)'
+    r'(?<=[.!?])\s+(?=[A-Z"‘“’])'
+)
 
 
 class VoicePlanError(Exception):
@@ -21,13 +44,24 @@ def split_into_sentence_chunks(text: str, max_chars: int = CHUNK_SIZE_CHARS) ->
     Uses paragraph breaks (double newlines) as primary split points first,
     then sentence boundaries within long paragraphs.
     """
-    # First split on paragraph breaks
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    return list(split_into_sentence_chunks_iter(text.split("\n\n"), max_chars))
 
-    chunks = []
-    current_chunk = ""
+
+def split_into_sentence_chunks_iter(paragraphs, max_chars: int = CHUNK_SIZE_CHARS):
+    """Yield chunks of at most max_chars from an iterable of paragraphs.
+
+    Paragraphs are consumed lazily, so peak memory is bounded by one chunk
+    (~max_chars) plus whatever the caller holds, not the whole chapter.
+    """
+    # Accumulate sentence parts in a list and join only on flush — repeated
+    # str += reallocated the whole growing chunk for every sentence.
+    current_parts: list[str] = []
+    current_len = 0
 
     for para in paragraphs:
+        para = para.strip()
+        if not para:
+            continue
         # If the paragraph itself is too long, split at sentence boundaries
         if len(para) > max_chars:
             sentences = _split_sentences(para)
@@ -38,41 +72,61 @@ def split_into_sentence_chunks(text: str, max_chars: int = CHUNK_SIZE_CHARS) ->
             if not sentence:
                 continue
             # If adding this sentence would exceed the limit, flush current chunk
-            if current_chunk and len(current_chunk) + len(sentence) + 2 > max_chars:
-                chunks.append(current_chunk.strip())
-                current_chunk = sentence
-            elif not current_chunk:
-                current_chunk = sentence
+            if current_parts and current_len + len(sentence) + 2 > max_chars:
+                yield from _hard_split(" ".join(current_parts), max_chars)
+                current_parts = [sentence]
+                current_len = len(sentence)
             else:
-                current_chunk += " " + sentence
+                current_len += len(sentence) + (1 if current_parts else 0)
+                current_parts.append(sentence)
 
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    if current_parts:
+        yield from _hard_split(" ".join(current_parts), max_chars)
 
-    # Last-resort hard split for any chunk still over the limit
-    final_chunks = []
-    for chunk in chunks:
-        if len(chunk) <= max_chars:
-            final_chunks.append(chunk)
-        else:
-            # Hard split at word boundaries
-            while len(chunk) > max_chars:
-                split_at = chunk.rfind(" ", 0, max_chars)
-                if split_at == -1:
-                    split_at = max_chars
-                final_chunks.append(chunk[:split_at].strip())
-                chunk = chunk[split_at:].strip()
-            if chunk:
-                final_chunks.append(chunk)
 
-    return [c for c in final_chunks if c]
+def _hard_split(chunk: str, max_chars: int):
+    """Last-resort word-boundary split for a chunk still over the limit."""
+    if len(chunk) <= max_chars:
+        yield chunk
+        return
+    # Track indices so substrings are materialized once instead of
+    # re-slicing the shrinking remainder
+    start = 0
+    while len(chunk) - start > max_chars:
+        split_at = chunk.rfind(" ", start, start + max_chars)
+        if split_at <= start:
+            split_at = start + max_chars
+        piece = chunk[start:split_at].strip()
+        if piece:
+            yield piece
+        start = split_at
+    tail = chunk[start:].strip()
+    if tail:
+        yield tail
 
 
 def _split_sentences(text: str) -> list[str]:
     """Split text into sentences using punctuation-based heuristics."""
-    # Split after .!? followed by whitespace before capital letter or quote
-    parts = re.split(r'(?<=[.!?])\s+(?=[A-Z"\u2018\u201c\u2019])', text)
-    return [p.strip() for p in parts if p.strip()]
+    return [p.strip() for p in _SENTENCE_SPLIT_RE.split(text) if p.strip()]
+
+
+def _error_status(error) -> int | None:
+    """Best-effort HTTP status code from an SDK or httpx exception."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(error, "status_code", None)  # elevenlabs ApiError
+    return status
+
+
+def _retry_after(error, default: float) -> float:
+    """Server-suggested Retry-After seconds, falling back to our backoff."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            return float(headers.get("Retry-After", default))
+        except (TypeError, ValueError):
+            pass
+    return default
 
 
 def synthesize_chunk(
@@ -81,48 +135,83 @@ def synthesize_chunk(
     voice_id: str,
     model_id: str,
     output_path: Path,
+    optimize_streaming_latency: int | None = 3,
+    output_format: str = "mp3_22050_32",
 ) -> Path:
-    """Call ElevenLabs TTS API for a single chunk, save as MP3."""
-    from elevenlabs import VoiceSettings
+    """Call ElevenLabs TTS API for a single chunk, save as MP3.
+
+    optimize_streaming_latency (0-4) tells the server to skip optional
+    post-processing for lower time-to-first-byte; batch audiobook synthesis
+    has no interactive listener, so level 3 is the default.
 
+    output_format names an ElevenLabs MP3 encoding; spoken word is fine at
+    22.05kHz/32kbps, which downloads and stores a quarter of the bytes of
+    the 44.1kHz/128kbps music-grade default.
+    """
     delay = RETRY_DELAY = 5
     last_error = None
 
+    request_kwargs = dict(
+        voice_id=voice_id,
+        text=text,
+        model_id=model_id,
+        voice_settings=_DEFAULT_VOICE_SETTINGS,
+        output_format=output_format,
+    )
+    if optimize_streaming_latency is not None:
+        request_kwargs["optimize_streaming_latency"] = optimize_streaming_latency
+
+    # elevenlabs 2.x renamed convert_as_stream to stream; feature-detect so
+    # either SDK generation works.
+    stream_fn = getattr(client.text_to_speech, "convert_as_stream", None)
+    if stream_fn is None:
+        stream_fn = client.text_to_speech.stream
+
     for attempt in range(MAX_RETRIES):
         try:
-            audio_generator = client.text_to_speech.convert(
-                voice_id=voice_id,
-                text=text,
-                model_id=model_id,
-                voice_settings=VoiceSettings(
-                    stability=0.5,
-                    similarity_boost=0.75,
-                    style=0.0,
-                    use_speaker_boost=True,
-                ),
-                output_format="mp3_44100_128",
-            )
-            audio_bytes = b"".join(audio_generator)
+            try:
+                audio_stream = stream_fn(**request_kwargs)
+            except TypeError:
+                # Newer SDK versions dropped the latency kwarg; retry without it
+                if request_kwargs.pop("optimize_streaming_latency", None) is None:
+                    raise
+                audio_stream = stream_fn(**request_kwargs)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_bytes(audio_bytes)
+            # Write bytes as they arrive: overlaps download with server-side
+            # synthesis and keeps peak memory at one HTTP buffer per worker.
+            try:
+                with output_path.open("wb") as f:
+                    for audio_chunk in audio_stream:
+                        f.write(audio_chunk)
+            except BaseException:
+                # Never leave a partial MP3 that the resume logic would
+                # mistake for a finished chunk.
+                output_path.unlink(missing_ok=True)
+                raise
             return output_path
 
+        except httpx.TransportError as e:
+            # Timeouts and connection resets are always worth retrying
+            last_error = e
+            print(f"\n  Network error (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+            time.sleep(delay)
+            delay *= 2
         except Exception as e:
             last_error = e
-            error_str = str(e).lower()
+            status = _error_status(e)
             # Non-retryable errors — clear message instead of raw traceback
-            if "401" in error_str or "unauthorized" in error_str:
+            if status == 401:
                 raise SystemExit("ERROR: Invalid API key. Check ELEVENLABS_API_KEY in .env")
-            if "402" in error_str or "payment" in error_str or "quota" in error_str:
+            if status == 402:
                 raise VoicePlanError(
                     f"Voice '{voice_id}' requires a paid plan (402 Payment Required)."
                 )
-            if "422" in error_str or "invalid" in error_str:
+            if status == 422:
                 raise SystemExit(f"ERROR: Invalid request — {e}")
-            # Retry on rate limits or server errors
-            if "429" in error_str or "rate" in error_str or "5" in error_str[:3]:
+            # Retry on rate limits or server errors, honoring Retry-After
+            if status == 429 or (status is not None and status >= 500):
                 print(f"\n  Rate limit / server error (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
-                time.sleep(delay)
+                time.sleep(_retry_after(e, delay))
                 delay *= 2
             else:
                 raise
@@ -130,49 +219,127 @@ def synthesize_chunk(
     raise RuntimeError(f"TTS failed after {MAX_RETRIES} attempts: {last_error}")
 
 
-def synthesize_chapter(
+@dataclass
+class ChunkJob:
+    """One TTS request planned ahead of synthesis."""
+    chapter_index: int
+    chunk_index: int
+    chunk_key: str
+    text: str
+    output_path: Path
+
+
+def plan_chunks(chapters, chunks_dir: Path) -> list[ChunkJob]:
+    """Pre-split every chapter into ChunkJobs before any synthesis starts."""
+    jobs = []
+    for chapter in chapters:
+        # Prepend a chapter title announcement for natural narration; chain
+        # avoids re-materializing the chapter text as one title+body string
+        paragraphs = chain([f"{chapter.tts_title}."], chapter.text.split("\n\n"))
+        for chunk_idx, chunk_text in enumerate(split_into_sentence_chunks_iter(paragraphs)):
+            chunk_key = f"ch{chapter.index:02d}_chunk{chunk_idx:03d}"
+            jobs.append(ChunkJob(
+                chapter_index=chapter.index,
+                chunk_index=chunk_idx,
+                chunk_key=chunk_key,
+                text=chunk_text,
+                output_path=chunks_dir / f"{chunk_key}.mp3",
+            ))
+    return jobs
+
+
+def synthesize_book(
     client,
-    chapter_index: int,
-    chapter_title: str,
-    tts_title: str,
-    chapter_text: str,
+    chapters,
     voice_id: str,
     model_id: str,
     chunks_dir: Path,
     progress: dict,
-    save_progress_fn,
-) -> list[Path]:
+    record_chunk_fn,
+    max_workers: int = DEFAULT_CONCURRENCY,
+    optimize_streaming_latency: int | None = 3,
+    output_format: str = "mp3_22050_32",
+    on_chapter_complete=None,
+) -> dict[int, list[Path]]:
     """
-    Synthesize all chunks for one chapter. Returns list of chunk MP3 paths in order.
+    Synthesize every chapter's chunks through one book-wide thread pool.
     Skips chunks already marked complete in progress dict.
-    """
-    # Prepend a chapter title announcement for natural narration
-    full_text = f"{tts_title}.\n\n{chapter_text}"
-    chunks = split_into_sentence_chunks(full_text)
 
-    chunk_paths = []
-    completed = set(progress.get("completed_chunks", []))
+    Planning all chunks up front keeps the pool saturated across chapter
+    boundaries instead of draining to a single request at each chapter's
+    end, and allows one global progress bar with an accurate ETA. Rate
+    limits are handled by the 429 backoff in synthesize_chunk; completions
+    are reported to record_chunk_fn(chunk_key), a cheap append to the
+    caller's progress WAL.
 
-    with tqdm(total=len(chunks), desc=f"  {chapter_title[:50]}", unit="chunk") as pbar:
-        for chunk_idx, chunk_text in enumerate(chunks):
-            chunk_key = f"ch{chapter_index:02d}_chunk{chunk_idx:03d}"
-            output_path = chunks_dir / f"{chunk_key}.mp3"
+    Returns {chapter_index: [chunk mp3 paths in order]}. As soon as the last
+    chunk of a chapter finishes, on_chapter_complete(chapter_index, paths)
+    fires so the caller can start assembling that chapter immediately.
+    """
+    jobs = plan_chunks(chapters, chunks_dir)
+    # The caller keeps completed_chunks as a set; mutating it in place means
+    # no per-completion list rebuild and no copy here.
+    completed = progress.setdefault("completed_chunks", set())
 
-            if chunk_key in completed and output_path.exists():
-                chunk_paths.append(output_path)
-                pbar.update(1)
-                continue
+    # One listdir confirms survivors instead of a stat syscall per chunk
+    chunks_dir.mkdir(parents=True, exist_ok=True)
+    existing = set(os.listdir(chunks_dir))
+
+    chapter_paths: dict[int, list[Path]] = {}
+    remaining: dict[int, set[str]] = {}
+    pending: list[ChunkJob] = []
+    for job in jobs:
+        chapter_paths.setdefault(job.chapter_index, []).append(job.output_path)
+        if not (job.chunk_key in completed and job.output_path.name in existing):
+            pending.append(job)
+            remaining.setdefault(job.chapter_index, set()).add(job.chunk_key)
 
-            synthesize_chunk(client, chunk_text, voice_id, model_id, output_path)
+    # Chapters whose chunks all survived a previous run are complete up front
+    if on_chapter_complete is not None:
+        for chapter in chapters:
+            if chapter.index not in remaining:
+                on_chapter_complete(chapter.index, chapter_paths[chapter.index])
 
-            completed.add(chunk_key)
-            progress["completed_chunks"] = list(completed)
-            save_progress_fn(progress)
+    # Coalesce terminal writes: redraw at most twice a second and only after
+    # ~1% of the book has finished, so fast chunks don't spend their time in
+    # tqdm's stderr flushes. Light smoothing keeps the ETA stable across the
+    # bursty completion pattern of a parallel pool.
+    with tqdm(
+        total=len(jobs), desc="  Synthesizing", unit="chunk",
+        mininterval=0.5, miniters=max(1, len(jobs) // 100), smoothing=0.1,
+    ) as pbar:
+        pbar.update(len(jobs) - len(pending))
 
-            chunk_paths.append(output_path)
-            pbar.update(1)
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                futures = {
+                    executor.submit(
+                        synthesize_chunk, client, job.text, voice_id, model_id,
+                        job.output_path,
+                        optimize_streaming_latency=optimize_streaming_latency,
+                        output_format=output_format,
+                    ): job
+                    for job in pending
+                }
+                # Futures are drained on the main thread, so progress updates
+                # need no locking and tqdm never sees contention.
+                for future in as_completed(futures):
+                    try:
+                        future.result()  # propagate synthesis errors
+                    except BaseException:
+                        # Fatal errors (bad key, unpaid voice, invalid
+                        # request) must not let every queued chunk still
+                        # fire its doomed API call during pool shutdown.
+                        executor.shutdown(cancel_futures=True)
+                        raise
+                    job = futures[future]
+                    completed.add(job.chunk_key)
+                    record_chunk_fn(job.chunk_key)
+                    pbar.update(1)
 
-            # Small pause to be respectful of rate limits
-            time.sleep(0.3)
+                    chapter_remaining = remaining[job.chapter_index]
+                    chapter_remaining.discard(job.chunk_key)
+                    if not chapter_remaining and on_chapter_complete is not None:
+                        on_chapter_complete(job.chapter_index, chapter_paths[job.chapter_index])
 
-    return chunk_paths
+    return chapter_paths
@@ -1,6 +1,8 @@
 """voice_setup.py — ElevenLabs voice selection, cloning, and persistence."""
 
+import json
 import os
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv, set_key
@@ -10,10 +12,54 @@ ENV_FILE = Path(".env")
 # ElevenLabs default fallback voice (Aria - neutral, natural)
 DEFAULT_VOICE_ID = "9BWtsMINqrJLrRacOk9x"
 
+# Library search results cached per query so repeated runs (dry-run loops,
+# chapter-range iteration) skip the API round-trip. Empty results are cached
+# too — "no match" is just as stable as a match within the TTL.
+VOICE_LIB_CACHE = Path(".voice_cache.json")
+VOICE_LIB_CACHE_TTL = 24 * 3600  # seconds
+
+
+def _cache_lookup(query: str) -> tuple[bool, str | None]:
+    """Return (hit, voice_id_or_None) for a cached library search."""
+    if not VOICE_LIB_CACHE.exists():
+        return False, None
+    try:
+        cache = json.loads(VOICE_LIB_CACHE.read_bytes())
+        entry = cache.get(query)
+    except (ValueError, OSError):
+        return False, None
+    if entry is None or time.time() - entry.get("ts", 0) > VOICE_LIB_CACHE_TTL:
+        return False, None
+    return True, entry.get("voice_id")
+
+
+def _cache_store(query: str, voice_id: str | None) -> None:
+    """Record a library search result (including None) in the cache file."""
+    cache = {}
+    if VOICE_LIB_CACHE.exists():
+        try:
+            cache = json.loads(VOICE_LIB_CACHE.read_bytes())
+        except (ValueError, OSError):
+            pass
+    cache[query] = {"voice_id": voice_id, "ts": time.time()}
+    try:
+        VOICE_LIB_CACHE.write_text(json.dumps(cache))
+    except OSError:
+        pass  # cache is best-effort
+
+
+# load_dotenv re-reads and re-parses .env on every call; one load per
+# process is enough (speakbook.main already does it at startup, the guard
+# covers standalone callers).
+_ENV_LOADED = False
+
 
 def load_voice_id() -> str | None:
     """Load VOICE_ID from .env file. Returns None if not set."""
-    load_dotenv()
+    global _ENV_LOADED
+    if not _ENV_LOADED:
+        load_dotenv()
+        _ENV_LOADED = True
     vid = os.getenv("VOICE_ID", "").strip()
     return vid if vid else None
 
@@ -25,12 +71,25 @@ def save_voice_id(voice_id: str) -> None:
     print(f"  Saved VOICE_ID={voice_id} to {ENV_FILE}")
 
 
-def search_voice_library(client, query: str = "narrator") -> str | None:
+def search_voice_library(client, query: str = "narrator", refresh: bool = False) -> str | None:
     """
     Search the ElevenLabs public Voice Library for a matching voice.
     Returns voice_id of the best match, or None if not found.
     The voice must be added to the user's account before use.
+
+    Results are cached in .voice_cache.json for 24h (pass refresh=True to
+    bypass); empty results are cached too, so a fruitless search isn't
+    repeated on every run.
     """
+    if not refresh:
+        hit, cached_id = _cache_lookup(query)
+        if hit:
+            if cached_id:
+                print(f"  Using cached library voice for '{query}': {cached_id}")
+            else:
+                print(f"  Library search for '{query}' cached as empty; skipping.")
+            return cached_id
+
     try:
         print(f"  Searching ElevenLabs Voice Library for '{query}'...")
         results = client.voices.get_shared(
@@ -40,6 +99,7 @@ def search_voice_library(client, query: str = "narrator") -> str | None:
         voices = getattr(results, "voices", None) or []
         if not voices:
             print("  No voices found in library.")
+            _cache_store(query, None)
             return None
 
         # Pick the first result
@@ -50,6 +110,7 @@ def search_voice_library(client, query: str = "narrator") -> str | None:
 
         if not voice_id:
             print("  Voice found but missing voice_id.")
+            _cache_store(query, None)
             return None
 
         print(f"  Found: '{voice_name}' (id: {voice_id})")
@@ -70,9 +131,11 @@ def search_voice_library(client, query: str = "narrator") -> str | None:
                 else:
                     print(f"  Warning: could not add voice to account: {e}")
 
+        _cache_store(query, voice_id)
         return voice_id
 
     except Exception as e:
+        # Transient failures are not cached — the next run should retry
         print(f"  Voice Library search failed: {e}")
         return None
 
@@ -100,6 +163,7 @@ def setup_voice(
     sample_path: Path | None = None,
     use_library: bool = True,
     search_query: str = "narrator",
+    refresh_library: bool = False,
 ) -> str:
     """
     Resolve a voice ID using the following priority:
@@ -121,7 +185,7 @@ def setup_voice(
 
     # Priority 2: Voice Library
     if use_library:
-        voice_id = search_voice_library(client, search_query)
+        voice_id = search_voice_library(client, search_query, refresh=refresh_library)
         if voice_id:
             save_voice_id(voice_id)
             return voice_id